@@ -0,0 +1,29 @@
+# --------------------
+# Shared constants
+# Defined once per process and imported by the dashboard pages.
+# --------------------
+
+# Cross Functional Assumptions:
+GROSS_MARGIN = 0.80 # 80%
+SALES_COST_MULTIPLIER = 5 # Total S&M Spend = Campaign Cost * 5
+
+# --- Benchmarks ---
+MARKETING_BENCHMARKS = {
+    "MRR per Dollar Spend": {"value": 0.21, "source": "derived using 3:1 LTV:CAC Ratio (36M LTV)", "url": "https://callin.io/b2b-saas-marketing-benchmarks/"},
+    "MQL to SAL Rate": {"value": 0.61, "source": "Data Mania & Gartner", "url": "https://www.data-mania.com/blog/mql-to-sql-conversion-rate-benchmarks-2025/"},
+    "SAL to SQL Rate": {"value": 0.40, "source": "Gartner Sales Development Metrics", "url": "https://www.gartner.com/smarterwithgartner/sales-development-metrics-assessing-low-conversion-rates"},
+    "SQL to Closed Rate": {"value": 0.20, "source": "Gartner Sales Development Metrics", "url": "https://www.gartner.com/smarterwithgartner/sales-development-metrics-assessing-low-conversion-rates"}
+}
+
+SALES_BENCHMARKS = {
+    "Quota Attainment": {"value": 0.75, "source": "Sapphire Ventures & KeyBanc", "url": "https://info.sapphireventures.com/2024-keybanc-capital-markets-and-sapphire-ventures-saas-survey"},
+    "Percent of Reps at Quota": {"value": 0.51, "source": "Bridge Group SaaS AE Report", "url": "https://charliecowan.ai/blog/5-essential-learnings-from-the-2024-saas-ae-report-bridge-group"},
+    "Sales Cycle": {"value": 92, "source": "Bridge Group SaaS AE Report", "url": "https://www.cfodesk.co.il/wp-content/uploads/2023/09/SaaS_AE_Metrics.pdf"},
+    "Pipeline Coverage": {"value": 4.0, "source": "SaaStr", "url": "https://www.saastr.com/dear-saastr-what-are-good-benchmarks-for-sales-productivity-in-saas/#:~:text=6,marketing%20isn%E2%80%99t%20generating%20sufficient%20leads"}
+}
+
+CUSTOMER_SUCCESS_BENCHMARKS = {
+    "NRR": {"value": 1.20, "source": "Wudpecker", "url": "https://www.wudpecker.io/blog/retention-benchmarks-for-b2b-saas-in-2025"},
+    "GRR": {"value": 0.95, "source": "Wudpecker", "url": "https://www.wudpecker.io/blog/retention-benchmarks-for-b2b-saas-in-2025"},
+    "Monthly Revenue Churn": {"value": 0.004, "source": "Hubfi", "url": "https://www.hubifi.com/blog/calculate-saas-churn-rate"}
+}
@@ -0,0 +1,77 @@
+import contextlib
+import logging
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# --------------------
+# Dataset Reading
+# The CSVs under data/ are the source of truth. Each one gets a Parquet copy next
+# to it, which stores dtypes natively, so later reads skip text parsing and the
+# string -> datetime conversion.
+#
+# The pages' loaders cache their prepared frames with st.cache_data(persist="disk"),
+# so they survive server restarts. Each loader takes the file_mtime() of the CSVs
+# it reads as arguments, making them part of the cache key: editing a CSV
+# invalidates the cached frame.
+# --------------------
+def file_mtime(file_path):
+    # A missing file is reported by the loaders themselves, so it gets a constant cache key.
+    return os.path.getmtime(file_path) if os.path.exists(file_path) else None
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def write_parquet(csv_path):
+    # pyarrow's multithreaded parser (already required for Parquet) does the fallback read;
+    # pandas' own parser takes over for a CSV pyarrow rejects.
+    try:
+        df = pd.read_csv(csv_path, engine='pyarrow', parse_dates=['date'])
+    except (pa.ArrowException, ValueError):
+        df = pd.read_csv(csv_path, parse_dates=['date'])
+    pq_path = parquet_path(csv_path)
+    tmp_path = None
+    try:
+        # Write to a unique temp file first, so a concurrent reader never sees a partial
+        # file and two sessions refreshing at once don't write into the same one.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(pq_path) or ".", suffix=".parquet.tmp")
+        os.close(fd)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, pq_path)
+    except (OSError, pa.ArrowException, ValueError) as e:
+        # A failed copy only costs the fast path; the pages keep reading the CSV
+        # (e.g. on read-only deploys).
+        logger.warning("Could not write %s: %s", pq_path, e)
+    finally:
+        # Gone already after a successful replace.
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+    return df
+
+def read_dataset(csv_path, columns=None):
+    # Served from the Parquet copy when it is up to date, so only `columns` are read
+    # and 'date' is already datetime64; otherwise the CSV is parsed and the copy refreshed.
+    pq_path = parquet_path(csv_path)
+    # getmtime raises FileNotFoundError for a missing CSV, which the pages report.
+    if os.path.exists(pq_path) and os.path.getmtime(pq_path) >= os.path.getmtime(csv_path):
+        return pd.read_parquet(pq_path, columns=columns)
+
+    df = write_parquet(csv_path)
+    return df[columns] if columns else df
+
+def downcast(df, keep=()):
+    # 32-bit columns halve the cached frames and the payload sent to Plotly. Money
+    # columns go in `keep`: above 2**24 float32 can't hold every whole-dollar amount,
+    # so totals built from them would drift.
+    for col in df.select_dtypes('float64'):
+        if col not in keep:
+            df[col] = df[col].astype('float32')
+    for col in df.select_dtypes('int64'):
+        if col not in keep:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 
+from constants import MARKETING_BENCHMARKS
+from datasets import file_mtime, read_dataset
+
 # --------------------
 # Page Configuration
 # --------------------
@@ -15,37 +19,63 @@ st.set_page_config(page_title="Marketing Performance", page_icon="🔬", layout=
 # --------------------
 # Data Loading & Preparation
 # --------------------
-@st.cache_data
-def load_data(file_path):
+MARKETING_CSV = "data/sprinto_database - marketing.csv"
+
+def safe_ratio(numerator, denominator):
+    # Rows with a zero denominator get NaN (shown as blank, not as a real $0 or 0%)
+    # instead of inf, and no RuntimeWarning.
+    return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=denominator > 0)
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=4)
+def load_data(file_path, mtime):
     try:
-        df = pd.read_csv(file_path)
-        df['date'] = pd.to_datetime(df['date'])
+        df = read_dataset(
+            file_path,
+            columns=['date', 'campaign_name', 'mql', 'sal', 'sql', 'closed', 'cost', 'mrr']
+        ).astype({'campaign_name': 'category', 'mql': 'int32', 'sal': 'int32', 'sql': 'int32', 'closed': 'int32', 'cost': 'int64', 'mrr': 'int64'})
         # --- Calculated Columns ---
-        df['mrr_per_dollar'] = df['mrr'] / df['cost']
-        df['cpa_closed'] = df['cost'] / df['closed']
-        df['mql_to_sal_rate'] = df['sal'] / df['mql']
-        df['sal_to_sql_rate'] = df['sql'] / df['sal']
-        df['sql_to_closed_rate'] = df['closed'] / df['sql']
+        # Each input column is pulled out as an array once and all ratios are assigned in one call.
+        mql, sal, sql, closed, cost, mrr = (df[col].to_numpy() for col in ['mql', 'sal', 'sql', 'closed', 'cost', 'mrr'])
+        df = df.assign(
+            mrr_per_dollar=safe_ratio(mrr, cost),
+            cpa_closed=safe_ratio(cost, closed),
+            mql_to_sal_rate=safe_ratio(sal, mql),
+            sal_to_sql_rate=safe_ratio(sql, sal),
+            sql_to_closed_rate=safe_ratio(closed, sql),
+            mql_to_closed_rate=safe_ratio(closed, mql)
+        )
         return df
     except FileNotFoundError:
         st.error(f"Error: File not found at {file_path}. Please check the file path.")
         return None
 
-marketing_df = load_data("data/sprinto_database - marketing.csv")
+FUNNEL_STAGES = ['mql', 'sal', 'sql', 'closed']
+TOTAL_COLUMNS = FUNNEL_STAGES + ['cost', 'mrr']
+
+# Campaign-level numbers only change with the data, so build them once per CSV
+# version (the underscore keeps Streamlit from hashing the frame on every rerun).
+@st.cache_data(show_spinner=False)
+def build_campaign_rollup(_df, mtime):
+    # One row per selectbox option: the overall totals followed by each campaign.
+    campaign_sums = _df.groupby('campaign_name', observed=True, sort=False)[TOTAL_COLUMNS].sum()
+    campaign_totals = pd.concat([_df[TOTAL_COLUMNS].sum().to_frame('All Campaigns').T, campaign_sums])
+    campaign_perf = _df.sort_values('mrr_per_dollar', ascending=True)
+    return campaign_perf, campaign_totals
+
+@st.cache_data(show_spinner=False)
+def get_campaign_options(_df, mtime):
+    return ['All Campaigns', *pd.unique(_df['campaign_name']).tolist()]
+
+marketing_mtime = file_mtime(MARKETING_CSV)
+marketing_df = load_data(MARKETING_CSV, marketing_mtime)
 
 if marketing_df is None:
     st.stop()
 
-# --- Benchmarks Data (UPDATED) ---
-benchmarks = {
-    "MRR per Dollar Spend": {"value": 0.21, "source": "derived using 3:1 LTV:CAC Ratio (36M LTV)", "url": "https://callin.io/b2b-saas-marketing-benchmarks/"},
-    "MQL to SAL Rate": {"value": 0.61, "source": "Data Mania & Gartner", "url": "https://www.data-mania.com/blog/mql-to-sql-conversion-rate-benchmarks-2025/"},
-    "SAL to SQL Rate": {"value": 0.40, "source": "Gartner Sales Development Metrics", "url": "https://www.gartner.com/smarterwithgartner/sales-development-metrics-assessing-low-conversion-rates"},
-    "SQL to Closed Rate": {"value": 0.20, "source": "Gartner Sales Development Metrics", "url": "https://www.gartner.com/smarterwithgartner/sales-development-metrics-assessing-low-conversion-rates"}
-}
-# Cross Functional Assumptions:
-GROSS_MARGIN = 0.80 # 80%
-SALES_COST_MULTIPLIER = 5 # Total S&M Spend = Campaign Cost * 5
+campaign_perf, campaign_totals = build_campaign_rollup(marketing_df, marketing_mtime)
+
+# --- Benchmarks (see constants.py) ---
+benchmarks = MARKETING_BENCHMARKS
 
 # --------------------
 # Main Page Content
@@ -53,26 +83,23 @@ SALES_COST_MULTIPLIER = 5 # Total S&M Spend = Campaign Cost * 5
 st.title("🔬 Marketing Performance Dashboard")
 # st.markdown("Analyze campaign performance, funnel conversions, and return on investment.")
 
-campaign_options = ['All Campaigns'] + list(marketing_df['campaign_name'].unique())
+campaign_options = get_campaign_options(marketing_df, marketing_mtime)
 st.sidebar.header("Filters")
 selected_campaign = st.sidebar.selectbox("Select a Campaign", options=campaign_options)
 
-if selected_campaign == 'All Campaigns':
-    filtered_df = marketing_df
-else:
-    filtered_df = marketing_df[marketing_df['campaign_name'] == selected_campaign]
-
-if filtered_df.empty:
+if selected_campaign not in campaign_totals.index:
     st.warning("No data available for the selected campaign.")
     st.stop()
 
+selected_totals = campaign_totals.loc[selected_campaign]
+
 # --- Aggregate Metrics ---
-total_mql = int(filtered_df['mql'].sum())
-total_sal = int(filtered_df['sal'].sum())
-total_sql = int(filtered_df['sql'].sum())
-total_closed = int(filtered_df['closed'].sum())
-total_cost = int(filtered_df['cost'].sum())
-total_mrr = int(filtered_df['mrr'].sum())
+total_mql = int(selected_totals['mql'])
+total_sal = int(selected_totals['sal'])
+total_sql = int(selected_totals['sql'])
+total_closed = int(selected_totals['closed'])
+total_cost = int(selected_totals['cost'])
+total_mrr = int(selected_totals['mrr'])
 overall_mrr_per_dollar = total_mrr / total_cost if total_cost > 0 else 0
 mql_sal_rate = total_sal / total_mql if total_mql > 0 else 0
 sal_sql_rate = total_sql / total_sal if total_sal > 0 else 0
@@ -101,76 +128,90 @@ st.markdown("---")
 # --------------------
 # Visualizations (UPDATED)
 # --------------------
-col1, col2 = st.columns(2)
-with col1:
-    st.subheader("Conversion Funnel")
-    funnel_data = filtered_df[['mql', 'sal', 'sql', 'closed']].sum().reset_index()
-    funnel_data.columns = ['stage', 'count']
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_funnel_fig(funnel_counts):
+    # The four stage counts are the selected campaign's KPI totals, so no sum is needed here.
+    funnel_data = pd.DataFrame({'stage': FUNNEL_STAGES, 'count': funnel_counts})
     fig_funnel = px.funnel(funnel_data, x='count', y='stage', title="Overall Lead to Customer Funnel")
     fig_funnel.update_traces(textinfo="value+percent previous") # Adds percentages
-    st.plotly_chart(fig_funnel, use_container_width=True)
+    return fig_funnel
 
-with col2:
-    st.subheader("Campaign MRR per Dollar Spend")
-    campaign_perf = marketing_df.sort_values('mrr_per_dollar', ascending=True)
-    campaign_perf['color'] = campaign_perf['mrr_per_dollar'].apply(lambda x: '#0056fc' if x >= benchmarks['MRR per Dollar Spend']['value'] else 'lightgrey')
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_campaign_bar_fig(_campaign_perf, benchmark, mtime):
+    # A 0/1 flag mapped through a two-stop colorscale: one small int per bar goes over
+    # the wire instead of a hex string per bar.
+    above_benchmark = (_campaign_perf['mrr_per_dollar'].to_numpy() >= benchmark).astype('int8')
     fig_bar = px.bar(
-        campaign_perf, x='mrr_per_dollar', y='campaign_name', orientation='h',
+        _campaign_perf, x='mrr_per_dollar', y='campaign_name', orientation='h',
         title="Campaign Performance vs. Benchmark", labels={'mrr_per_dollar': 'MRR per $ Spent', 'campaign_name': 'Campaign'},
         text='mrr_per_dollar'
     )
-    fig_bar.update_traces(marker_color=campaign_perf['color'], texttemplate='$%{text:.2f}', textposition='outside')
-    fig_bar.add_vline(x=benchmarks['MRR per Dollar Spend']['value'], line_width=2, line_dash="dash", line_color="red", annotation_text="Benchmark")
-    max_value = campaign_perf['mrr_per_dollar'].max()
+    fig_bar.update_traces(marker=dict(color=above_benchmark, colorscale=[[0, 'lightgrey'], [1, '#0056fc']], cmin=0, cmax=1), texttemplate='$%{text:.2f}', textposition='outside')
+    fig_bar.add_vline(x=benchmark, line_width=2, line_dash="dash", line_color="red", annotation_text="Benchmark")
+    max_value = _campaign_perf['mrr_per_dollar'].max()
     fig_bar.update_layout(xaxis_range=[0, max_value * 1.15]) # Fixes axis range
+    return fig_bar
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_bubble_fig(_df, cpa_benchmark, conversion_benchmark, mtime):
+    fig_bubble = px.scatter(
+        _df,
+        x="cpa_closed",
+        y="mql_to_closed_rate",
+        size="mrr",
+        color="campaign_name",
+        hover_name="campaign_name",
+        size_max=60,
+        render_mode='webgl',
+        labels={ # UPDATED: Label with $
+            "cpa_closed": f"Campaign Cost per Closed Customer ($) - Lower is Better",
+            "mql_to_closed_rate": "MQL to Closed Conversion Rate (%) - Higher is Better",
+            "mrr": "Total MRR"
+        },
+        title="Campaign Efficiency vs. Effectiveness"
+    )
+
+    # NEW: Add benchmark lines to create quadrants
+    fig_bubble.add_vline(
+        x=cpa_benchmark,
+        line_width=2, line_dash="dash", line_color="red",
+        annotation_text=f"CPA Benchmark (${cpa_benchmark:,.0f})",
+        annotation_position="bottom right"
+    )
+    fig_bubble.add_hline(
+        y=conversion_benchmark,
+        line_width=2, line_dash="dash", line_color="red",
+        annotation_text=f"Conversion Benchmark ({conversion_benchmark:.0%})",
+        annotation_position="bottom right"
+    )
+
+    fig_bubble.update_layout(showlegend=False)
+    # Format axes as currency and percentage
+    fig_bubble.update_xaxes(tickprefix="$", tickformat=",.0f")
+    fig_bubble.update_yaxes(tickformat=".1%")
+    return fig_bubble
+
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Conversion Funnel")
+    fig_funnel = build_funnel_fig((total_mql, total_sal, total_sql, total_closed))
+    st.plotly_chart(fig_funnel, use_container_width=True)
+
+with col2:
+    st.subheader("Campaign MRR per Dollar Spend")
+    fig_bar = build_campaign_bar_fig(campaign_perf, benchmarks['MRR per Dollar Spend']['value'], marketing_mtime)
     st.plotly_chart(fig_bar, use_container_width=True)
 
 st.markdown("---")
 
 # Scatter Plot
 st.subheader("Campaign Performance Matrix")
-# Calculate MQL to Closed Rate for the scatter plot
-marketing_df['mql_to_closed_rate'] = marketing_df['closed'] / marketing_df['mql']
 
 # Define the benchmarks for this chart
 cpa_benchmark = 4000
 conversion_benchmark = 0.05 # 5%
 
-fig_bubble = px.scatter(
-    marketing_df,
-    x="cpa_closed",
-    y="mql_to_closed_rate",
-    size="mrr",
-    color="campaign_name",
-    hover_name="campaign_name",
-    size_max=60,
-    labels={ # UPDATED: Label with $
-        "cpa_closed": f"Campaign Cost per Closed Customer ($) - Lower is Better",
-        "mql_to_closed_rate": "MQL to Closed Conversion Rate (%) - Higher is Better",
-        "mrr": "Total MRR"
-    },
-    title="Campaign Efficiency vs. Effectiveness"
-)
-
-# NEW: Add benchmark lines to create quadrants
-fig_bubble.add_vline(
-    x=cpa_benchmark,
-    line_width=2, line_dash="dash", line_color="red",
-    annotation_text=f"CPA Benchmark (${cpa_benchmark:,.0f})",
-    annotation_position="bottom right"
-)
-fig_bubble.add_hline(
-    y=conversion_benchmark,
-    line_width=2, line_dash="dash", line_color="red",
-    annotation_text=f"Conversion Benchmark ({conversion_benchmark:.0%})",
-    annotation_position="bottom right"
-)
-
-fig_bubble.update_layout(showlegend=False)
-# Format axes as currency and percentage
-fig_bubble.update_xaxes(tickprefix="$", tickformat=",.0f")
-fig_bubble.update_yaxes(tickformat=".1%")
-
+fig_bubble = build_bubble_fig(marketing_df, cpa_benchmark, conversion_benchmark, marketing_mtime)
 st.plotly_chart(fig_bubble, use_container_width=True)
 
 st.markdown("---")
@@ -180,16 +221,18 @@ st.subheader("Campaign Details")
 # Create a dataframe for display with calculated metrics
 display_df = marketing_df[['campaign_name', 'mrr_per_dollar', 'cpa_closed', 'mql_to_sal_rate', 'sal_to_sql_rate', 'sql_to_closed_rate', 'mrr', 'cost']].set_index('campaign_name')
 
+# Formatting happens client-side; `step` sets the displayed precision for the presets.
 st.dataframe(
-    display_df.style.format({
-        'mrr_per_dollar': '${:.2f}',
-        'cpa_closed': '${:,.2f}',
-        'mql_to_sal_rate': '{:.1%}',
-        'sal_to_sql_rate': '{:.1%}',
-        'sql_to_closed_rate': '{:.1%}',
-        'mrr': '${:,.0f}',
-        'cost': '${:,.0f}'
-    })
+    display_df,
+    column_config={
+        'mrr_per_dollar': st.column_config.NumberColumn(format='dollar'),
+        'cpa_closed': st.column_config.NumberColumn(format='dollar'),
+        'mql_to_sal_rate': st.column_config.NumberColumn(format='percent', step=0.001),
+        'sal_to_sql_rate': st.column_config.NumberColumn(format='percent', step=0.001),
+        'sql_to_closed_rate': st.column_config.NumberColumn(format='percent', step=0.001),
+        'mrr': st.column_config.NumberColumn(format='dollar', step=1),
+        'cost': st.column_config.NumberColumn(format='dollar', step=1)
+    }
 )
 
 # --------------------
@@ -269,5 +312,4 @@ st.warning(
 )
 
 st.subheader("Benchmark Sources")
-for key, value in benchmarks.items():
-    st.markdown(f"- **{key}**:  [{value['source']}]({value['url']}).")
\ No newline at end of file
+st.markdown("\n".join(f"- **{key}**:  [{value['source']}]({value['url']})." for key, value in benchmarks.items()))
\ No newline at end of file
@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from constants import SALES_BENCHMARKS
+from datasets import downcast, file_mtime, read_dataset
+
 # --------------------
 # Page Configuration
 # --------------------
@@ -20,46 +24,63 @@ st.set_page_config(
 # --------------------
 # Data Loading and Preparation
 # --------------------
-@st.cache_data
-def load_data():
-    try:
-        sales_df = pd.read_csv("data/sprinto_database - sales.csv")
-        service_df = pd.read_csv("data/sprinto_database - service.csv")
+SALES_CSV = "data/sprinto_database - sales.csv"
+SERVICE_CSV = "data/sprinto_database - service.csv"
 
-        sales_df['date'] = pd.to_datetime(sales_df['date'])
-        service_df['date'] = pd.to_datetime(service_df['date'])
+def month_start(month_ord):
+    # Month ordinals (months since 1970-01) back to month-start timestamps for the Plotly axes.
+    return np.asarray(month_ord).astype('datetime64[M]').astype('datetime64[ns]')
+
+# The merged frame depends on both CSVs, so both mtimes are in the key.
+@st.cache_data(persist="disk", show_spinner=False, max_entries=4)
+def load_data(sales_mtime, service_mtime):
+    try:
+        sales_df = read_dataset(SALES_CSV)
+        # Only the growth columns of the service data feed the deal size.
+        service_df = read_dataset(SERVICE_CSV, columns=['date', 'growth_mrr', 'growth_accounts'])
         
-        sales_df['month_year'] = sales_df['date'].dt.to_period('M').dt.to_timestamp()
-        service_df['month_year'] = service_df['date'].dt.to_period('M').dt.to_timestamp()
+        # Truncate to the month with a single NumPy cast and keep it as an int32 month
+        # ordinal: a 4-byte groupby key that converts back with month_start() for plotting.
+        sales_df['month_ord'] = sales_df['date'].to_numpy().astype('datetime64[M]').astype('int32')
+        service_df['month_ord'] = service_df['date'].to_numpy().astype('datetime64[M]').astype('int32')
 
-        monthly_service = service_df.groupby('month_year').agg(
+        # Keep month_ord as the index so the deal size can be looked up by month directly.
+        monthly_service = service_df.groupby('month_ord').agg(
             total_growth_mrr=('growth_mrr', 'sum'),
             total_growth_accounts=('growth_accounts', 'sum')
-        ).reset_index()
+        )
         monthly_service['avg_deal_size'] = monthly_service['total_growth_mrr'] / monthly_service['total_growth_accounts']
         
-        merged_df = pd.merge(sales_df, monthly_service[['month_year', 'avg_deal_size']], on='month_year', how='left')
+        # A single-column lookup, so map it onto the sales rows instead of joining frames.
+        merged_df = sales_df
+        merged_df['avg_deal_size'] = merged_df['month_ord'].map(monthly_service['avg_deal_size'])
         
         merged_df['quota_attainment'] = (merged_df['sales'] / merged_df['quota'])
-        
-        return merged_df
+
+        # Categoricals make the filter's isin checks compare small integer codes. The
+        # categories keep order of appearance so they can be used as sidebar options.
+        for col in ['manager', 'sales_rep']:
+            merged_df[col] = pd.Categorical(merged_df[col], categories=pd.unique(merged_df[col]))
+
+        # Trailing number of each rep name ("Rep 10" -> 10) for natural sorting; NaN when
+        # a name has none. The regex runs once per category, not once per row. Stored as
+        # float64 (not a small nullable int) so large rep numbers can't overflow the cast.
+        merged_df['rep_num'] = merged_df['sales_rep'].str.extract(r'(\d+)$', expand=False).astype('float64')
+
+        return downcast(merged_df, keep=['sales', 'quota', 'avg_deal_size', 'quota_attainment', 'rep_num'])
 
     except FileNotFoundError as e:
         st.error(f"Error: A data file was not found. Please check the file path. Details: {e}")
         return None
 
-df = load_data()
+data_mtimes = (file_mtime(SALES_CSV), file_mtime(SERVICE_CSV))
+df = load_data(*data_mtimes)
 
 if df is None:
     st.stop()
 
-# --- Benchmarks Dictionary ---
-benchmarks = {
-    "Quota Attainment": {"value": 0.75, "source": "Sapphire Ventures & KeyBanc", "url": "https://info.sapphireventures.com/2024-keybanc-capital-markets-and-sapphire-ventures-saas-survey"},
-    "Percent of Reps at Quota": {"value": 0.51, "source": "Bridge Group SaaS AE Report", "url": "https://charliecowan.ai/blog/5-essential-learnings-from-the-2024-saas-ae-report-bridge-group"},
-    "Sales Cycle": {"value": 92, "source": "Bridge Group SaaS AE Report", "url": "https://www.cfodesk.co.il/wp-content/uploads/2023/09/SaaS_AE_Metrics.pdf"},
-    "Pipeline Coverage": {"value": 4.0, "source": "SaaStr", "url": "https://www.saastr.com/dear-saastr-what-are-good-benchmarks-for-sales-productivity-in-saas/#:~:text=6,marketing%20isn%E2%80%99t%20generating%20sufficient%20leads"}
-}
+# --- Benchmarks (see constants.py) ---
+benchmarks = SALES_BENCHMARKS
 
 # --------------------
 # Main Page Content
@@ -67,25 +88,64 @@ benchmarks = {
 st.title("⚙️ Sales Performance Dashboard")
 
 # --- Filters ---
+# Unique (manager, rep) pairs, in order of first appearance. A rep can appear under
+# more than one manager, so each pairing is kept. Looking reps up here keeps the
+# cascading filter to a check over these few pairs instead of every sales row.
+@st.cache_data(show_spinner=False)
+def get_manager_reps(_df, mtimes):
+    return _df[['manager', 'sales_rep']].drop_duplicates()
+
 st.sidebar.header("Filters")
-selected_manager = st.sidebar.multiselect("Manager", options=df['manager'].unique(), default=df['manager'].unique())
-reps_in_selected_manager = df[df['manager'].isin(selected_manager)]['sales_rep'].unique()
+manager_options = df['manager'].cat.categories
+manager_reps = get_manager_reps(df, data_mtimes)
+selected_manager = st.sidebar.multiselect("Manager", options=manager_options, default=manager_options)
+reps_in_selected_manager = manager_reps.loc[manager_reps['manager'].isin(selected_manager), 'sales_rep'].unique().tolist()
 selected_rep = st.sidebar.multiselect("Sales Rep", options=reps_in_selected_manager, default=reps_in_selected_manager)
 
 # --- Filter Dataframe ---
-filtered_df = df[(df['manager'].isin(selected_manager)) & (df['sales_rep'].isin(selected_rep))]
+# Compare the categorical codes against the selected categories' codes, so the mask
+# is built from small integer arrays rather than label lookups.
+selected_manager_codes = df['manager'].cat.categories.get_indexer(selected_manager)
+selected_rep_codes = df['sales_rep'].cat.categories.get_indexer(selected_rep)
+filter_mask = (
+    np.isin(df['manager'].cat.codes.to_numpy(), selected_manager_codes)
+    & np.isin(df['sales_rep'].cat.codes.to_numpy(), selected_rep_codes)
+)
+filtered_df = df[filter_mask]
 
 if filtered_df.empty:
     st.warning("No data available for the selected filters.")
     st.stop()
 
+# The sorted manager and rep selections together identify filtered_df (a rep can
+# appear under more than one manager). Cached builders key on them together with
+# the CSV mtimes.
+filter_key = (tuple(sorted(selected_manager)), tuple(sorted(selected_rep)))
+
 # --- KPIs: The Scoreboard ---
-total_sales = int(filtered_df['sales'].sum())
-total_quota = int(filtered_df['quota'].sum())
+# One pass over the filtered rows gives each rep's totals and mean attainment. The
+# scoreboard totals are summed from these few rows, and the mean attainment is
+# shared by the KPI, the distribution chart and the tiers.
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_rep_perf(_filtered_df, filter_key, mtimes):
+    rep_perf = _filtered_df.groupby('sales_rep', observed=True).agg(
+        total_sales=('sales', 'sum'),
+        total_quota=('quota', 'sum'),
+        quota_attainment=('quota_attainment', 'mean')
+    )
+    # Performance tier per rep, cached with the aggregate. Both thresholds come from one
+    # quantile call (one sort): 0 = bottom (<= p10), 1 = core, 2 = top (>= p80).
+    bottom_10_threshold, top_20_threshold = rep_perf['quota_attainment'].quantile([0.1, 0.8])
+    attainment_values = rep_perf['quota_attainment'].to_numpy()
+    rep_perf['tier'] = (attainment_values > bottom_10_threshold).astype('int8') + (attainment_values >= top_20_threshold)
+    return rep_perf
+
+rep_perf = build_rep_perf(filtered_df, filter_key, data_mtimes)
+total_sales = int(rep_perf['total_sales'].sum())
+total_quota = int(rep_perf['total_quota'].sum())
 overall_attainment = total_sales / total_quota if total_quota > 0 else 0
-reps_met_quota = filtered_df.groupby('sales_rep')['quota_attainment'].mean().reset_index()
-reps_met_quota = reps_met_quota[reps_met_quota['quota_attainment'] >= 1]
-percent_reps_met_quota = len(reps_met_quota) / len(filtered_df['sales_rep'].unique()) if len(filtered_df['sales_rep'].unique()) > 0 else 0
+rep_attainment = rep_perf['quota_attainment']
+percent_reps_met_quota = rep_attainment.ge(1).sum() / rep_attainment.size if rep_attainment.size > 0 else 0
 company_avg_deal_size = df['avg_deal_size'].mean()
 
 st.header("Overall Scoreboard")
@@ -99,11 +159,17 @@ st.divider()
 
 # --- Performance Over Time ---
 st.header("Performance Over Time")
-monthly_perf = filtered_df.groupby('month_year').agg(total_sales=('sales', 'sum'), total_quota=('quota', 'sum')).reset_index()
-fig_time = go.Figure()
-fig_time.add_trace(go.Bar(x=monthly_perf['month_year'], y=monthly_perf['total_sales'], name='Sales'))
-fig_time.add_trace(go.Scatter(x=monthly_perf['month_year'], y=monthly_perf['total_quota'], name='Quota', mode='lines+markers'))
-st.plotly_chart(fig_time, use_container_width=True)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_time_fig(_filtered_df, filter_key, mtimes):
+    monthly_perf = _filtered_df.groupby('month_ord').agg(total_sales=('sales', 'sum'), total_quota=('quota', 'sum'))
+    months = month_start(monthly_perf.index)
+    fig_time = go.Figure()
+    fig_time.add_trace(go.Bar(x=months, y=monthly_perf['total_sales'], name='Sales'))
+    fig_time.add_trace(go.Scattergl(x=months, y=monthly_perf['total_quota'], name='Quota', mode='lines+markers'))
+    return fig_time
+
+st.plotly_chart(build_time_fig(filtered_df, filter_key, data_mtimes), use_container_width=True)
 
 st.divider()
 
@@ -111,10 +177,10 @@ st.divider()
 st.header("Leaderboards & Distribution")
 col1, col2 = st.columns(2)
 
-with col1:
-    st.subheader("Manager Performance")
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_manager_fig(_filtered_df, filter_key, mtimes):
     # UPDATED CALCULATION LOGIC
-    manager_perf_agg = filtered_df.groupby('manager').agg(
+    manager_perf_agg = _filtered_df.groupby('manager', observed=True).agg(
         total_sales=('sales', 'sum'),
         total_quota=('quota', 'sum')
     ).reset_index()
@@ -126,22 +192,29 @@ with col1:
     fig_manager.update_traces(texttemplate='%{text:.1%}', textposition='outside')
     max_manager_attainment = manager_perf['quota_attainment'].max()
     fig_manager.update_layout(xaxis_range=[0, max_manager_attainment * 1.15])
-    st.plotly_chart(fig_manager, use_container_width=True)
+    return fig_manager
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_dist_fig(_rep_attainment, filter_key, mtimes):
+    fig_dist = px.histogram(_rep_attainment, x="quota_attainment", title="Distribution of Rep Attainment")
+    fig_dist.update_layout(xaxis_title="Average Quota Attainment", yaxis_title="Number of Reps")
+    return fig_dist
+
+with col1:
+    st.subheader("Manager Performance")
+    st.plotly_chart(build_manager_fig(filtered_df, filter_key, data_mtimes), use_container_width=True)
 
 with col2:
     st.subheader("Rep Performance Distribution")
-    fig_dist = px.histogram(filtered_df.groupby('sales_rep')['quota_attainment'].mean(), x="quota_attainment", title="Distribution of Rep Attainment")
-    fig_dist.update_layout(xaxis_title="Average Quota Attainment", yaxis_title="Number of Reps")
-    st.plotly_chart(fig_dist, use_container_width=True)
+    st.plotly_chart(build_dist_fig(rep_attainment, filter_key, data_mtimes), use_container_width=True)
 
 # NEW: Performance Tiers Section
 st.subheader("Performance Tiers (Top 20% / Core 70% / Bottom 10%)")
-rep_attainment = filtered_df.groupby('sales_rep')['quota_attainment'].mean()
-top_20_threshold = rep_attainment.quantile(0.8)
-bottom_10_threshold = rep_attainment.quantile(0.1)
-top_performers = rep_attainment[rep_attainment >= top_20_threshold].index.tolist()
-bottom_performers = rep_attainment[rep_attainment <= bottom_10_threshold].index.tolist()
-middle_performers = rep_attainment[(rep_attainment > bottom_10_threshold) & (rep_attainment < top_20_threshold)].index.tolist()
+tier_codes = rep_perf['tier'].to_numpy()
+rep_names = rep_perf.index.to_numpy()
+top_performers = rep_names[tier_codes == 2].tolist()
+middle_performers = rep_names[tier_codes == 1].tolist()
+bottom_performers = rep_names[tier_codes == 0].tolist()
 tier1, tier2, tier3 = st.columns(3)
 with tier1:
     st.success("🏆 Top 20%")
@@ -157,50 +230,68 @@ st.divider()
 st.header("Monthly Rep Performance Heatmap")
 
 # --- Step 1: Create the Pivot Table ---
-# We create a table with reps as rows and months as columns.
+# We create a table with months as rows (Y-axis) and reps as columns (X-axis).
 # The value in each cell is the quota attainment for that rep in that month.
-# We use the raw 'month_year' (datetime object) for columns to ensure correct chronological sorting.
-rep_monthly_pivot = filtered_df.pivot_table(
-    index='sales_rep',
-    columns='month_year',
-    values='quota_attainment',
-    aggfunc='mean' # Since there's one entry per rep/month, 'mean' just selects that value.
-)
-
-# --- Step 2: Prepare the Data for Plotting ---
-# Transpose the table so months become the rows (Y-axis) and reps become columns (X-axis).
-# This is better for visualization if you have more reps than months.
-transposed_pivot = rep_monthly_pivot.T
-
-# Create a naturally sorted list of sales rep names for the x-axis.
-# This ensures "Rep 10" comes after "Rep 9", not after "Rep 1".
-try:
-    sorted_rep_names = sorted(transposed_pivot.columns, key=lambda x: int(x.split(' ')[1]))
-    # Re-order the columns in our final dataframe based on this sorted list.
-    final_pivot_for_chart = transposed_pivot[sorted_rep_names]
-except (ValueError, IndexError):
-    # Fallback if rep names are not in the "Rep X" format
-    sorted_rep_names = sorted(transposed_pivot.columns)
-    final_pivot_for_chart = transposed_pivot[sorted_rep_names]
-
-
-
+# Months are sorted by their ordinal and shown as datetimes to ensure correct chronological sorting.
+# The pivot is cached per filter selection and reused when a selection comes back.
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_heatmap_pivot(_filtered_df, filter_key, mtimes):
+    # The table is filled from each row's flat (month, rep) cell index: bincount sums
+    # the values and counts the rows per cell, so a rep/month with several rows (e.g.
+    # under two managers) gets their mean, like pivot_table; no groupby is needed.
+    rep_codes, reps = pd.factorize(_filtered_df['sales_rep'])
+    rep_nums = _filtered_df['rep_num'].to_numpy()
+    month_codes, month_ords = pd.factorize(_filtered_df['month_ord'], sort=True)
+    attainment = _filtered_df['quota_attainment'].to_numpy()
+    n_cells = len(month_ords) * len(reps)
+    valid = ~np.isnan(attainment)
+    flat_cells = (month_codes * len(reps) + rep_codes)[valid]
+    cell_sums = np.bincount(flat_cells, weights=attainment[valid], minlength=n_cells)
+    cell_counts = np.bincount(flat_cells, minlength=n_cells)
+    cells = np.divide(cell_sums, cell_counts, out=np.full(n_cells, np.nan), where=cell_counts > 0).reshape(len(month_ords), len(reps))
+
+    # --- Step 2: Prepare the Data for Plotting ---
+    # Months are the rows and reps the columns, which is better for visualization
+    # if you have more reps than months.
+    transposed_pivot = pd.DataFrame(
+        cells,
+        index=pd.Index(month_start(month_ords), name='month_year'),
+        columns=pd.Index(reps.astype(str), name='sales_rep')
+    )
+
+    # Create a naturally sorted list of sales rep names for the x-axis.
+    # This ensures "Rep 10" comes after "Rep 9", not after "Rep 1".
+    # Each rep's number was extracted in load_data; scatter it to the rep's column.
+    rep_numbers = np.empty(len(reps))
+    rep_numbers[rep_codes] = rep_nums
+    if np.isnan(rep_numbers).any():
+        # Fallback if rep names are not in the "Rep X" format
+        return transposed_pivot[sorted(transposed_pivot.columns)]
+    # Re-order the columns in our final dataframe by rep number.
+    return transposed_pivot.iloc[:, np.argsort(rep_numbers, kind='stable')]
+
+final_pivot_for_chart = build_heatmap_pivot(filtered_df, filter_key, data_mtimes)
 
 # --- Step 4: Create the Heatmap Visualization ---
 st.subheader("Heatmap Visual")
-# We use the unformatted datetime index for plotting to ensure Plotly sorts it correctly.
-fig_heatmap = px.imshow(
-    final_pivot_for_chart,
-    text_auto=".0%",
-    aspect="auto",
-    color_continuous_scale='RdYlGn',
-    color_continuous_midpoint=benchmarks['Quota Attainment']['value'], # 75% midpoint
-    title="Rep Quota Attainment % by Month",
-    labels=dict(x="Sales Rep", y="Month", color="Attainment")
-)
-
-# Format the y-axis labels to be readable month names
-fig_heatmap.update_yaxes(tickformat='%b %Y',dtick="M1")
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_heatmap_fig(_final_pivot_for_chart, filter_key, midpoint, mtimes):
+    # We use the unformatted datetime index for plotting to ensure Plotly sorts it correctly.
+    fig_heatmap = px.imshow(
+        _final_pivot_for_chart,
+        text_auto=".0%",
+        aspect="auto",
+        color_continuous_scale='RdYlGn',
+        color_continuous_midpoint=midpoint, # 75% midpoint
+        title="Rep Quota Attainment % by Month",
+        labels=dict(x="Sales Rep", y="Month", color="Attainment")
+    )
+
+    # Format the y-axis labels to be readable month names
+    fig_heatmap.update_yaxes(tickformat='%b %Y',dtick="M1")
+    return fig_heatmap
+
+fig_heatmap = build_heatmap_fig(final_pivot_for_chart, filter_key, benchmarks['Quota Attainment']['value'], data_mtimes)
 
 st.plotly_chart(fig_heatmap, use_container_width=True)
 
@@ -306,5 +397,4 @@ st.warning(
 )
 
 st.subheader("Benchmark Sources")
-for key, value in benchmarks.items():
-    st.markdown(f"- **{key}**: [{value['source']}]({value['url']}).")
\ No newline at end of file
+st.markdown("\n".join(f"- **{key}**: [{value['source']}]({value['url']})." for key, value in benchmarks.items()))
\ No newline at end of file
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
 
+from constants import CUSTOMER_SUCCESS_BENCHMARKS
+from datasets import downcast, file_mtime, read_dataset
+
 # --------------------
 # Page Configuration
 # --------------------
@@ -20,43 +23,78 @@ st.set_page_config(
 # --------------------
 # Data Loading and Preparation
 # --------------------
-@st.cache_data
-def load_data():
+SERVICE_CSV = "data/sprinto_database - service.csv"
+
+# Line charts ship at most this many points to the browser.
+MAX_LINE_POINTS = 500
+
+def lttb(x, y, n_out=MAX_LINE_POINTS):
+    # Largest-Triangle-Three-Buckets downsampling: keeps the first and last points and,
+    # from each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the next bucket's average. Short series pass through.
+    n = len(y)
+    if n <= n_out:
+        return x, y
+    xs = (x.view('int64') if x.dtype.kind == 'M' else x).astype('float64')
+    ys = y.astype('float64')
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    keep = np.empty(n_out, dtype='int64')
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a]) - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+def ratio_or_nan(numerator, denominator):
+    # Months with a zero denominator get NaN (skipped by the period means) instead of inf.
+    return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=denominator != 0)
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=4)
+def load_data(file_path, mtime):
     try:
-        df = pd.read_csv("data/sprinto_database - service.csv")
-        df['date'] = pd.to_datetime(df['date'])
+        df = read_dataset(
+            file_path,
+            columns=['date', 'customer_accounts_bom', 'churn_accounts', 'book_of_business_bom', 'growth_mrr', 'churn_mrr']
+        )
+        # Sorted by date so the period filter can slice instead of masking.
+        df = df.sort_values('date', ignore_index=True)
         
         # --- Calculate Core Metrics ---
-        # Gross Revenue Retention (GRR)
-        df['grr'] = (df['book_of_business_bom'] - df['churn_mrr']) / df['book_of_business_bom']
-        
-        # Revenue and Customer Churn Rates
-        df['revenue_churn_rate'] = df['churn_mrr'] / df['book_of_business_bom']
-        df['customer_churn_rate'] = df['churn_accounts'] / df['customer_accounts_bom']
-        
-        # Average Revenue Per Account (ARPA)
-        df['arpa'] = df['book_of_business_bom'] / df['customer_accounts_bom']
-        
-        # Net MRR Growth
-        df['net_mrr_growth'] = df['growth_mrr'] - df['churn_mrr']
-        
-        return df
+        # The shared inputs are pulled out as arrays once and reused by every metric.
+        book_of_business = df['book_of_business_bom'].to_numpy()
+        accounts = df['customer_accounts_bom'].to_numpy()
+        churn_mrr = df['churn_mrr'].to_numpy()
+        df = df.assign(
+            # Gross Revenue Retention (GRR)
+            grr=ratio_or_nan(book_of_business - churn_mrr, book_of_business),
+            # Revenue and Customer Churn Rates
+            revenue_churn_rate=ratio_or_nan(churn_mrr, book_of_business),
+            customer_churn_rate=ratio_or_nan(df['churn_accounts'].to_numpy(), accounts),
+            # Average Revenue Per Account (ARPA)
+            arpa=ratio_or_nan(book_of_business, accounts),
+            # Net MRR Growth
+            net_mrr_growth=df['growth_mrr'].to_numpy() - churn_mrr
+        )
+
+        return downcast(df, keep=['book_of_business_bom', 'growth_mrr', 'churn_mrr', 'arpa', 'net_mrr_growth'])
 
     except FileNotFoundError as e:
         st.error(f"Error: The file was not found. Please check the file path. Details: {e}")
         return None
 
-df = load_data()
+service_mtime = file_mtime(SERVICE_CSV)
+df = load_data(SERVICE_CSV, service_mtime)
 
 if df is None:
     st.stop()
 
-# --- Benchmarks Dictionary ---
-benchmarks = {
-    "NRR": {"value": 1.20, "source": "Wudpecker", "url": "https://www.wudpecker.io/blog/retention-benchmarks-for-b2b-saas-in-2025"},
-    "GRR": {"value": 0.95, "source": "Wudpecker", "url": "https://www.wudpecker.io/blog/retention-benchmarks-for-b2b-saas-in-2025"},
-    "Monthly Revenue Churn": {"value": 0.004, "source": "Hubfi", "url": "https://www.hubifi.com/blog/calculate-saas-churn-rate"}
-}
+# --- Benchmarks (see constants.py) ---
+benchmarks = CUSTOMER_SUCCESS_BENCHMARKS
 
 # --------------------
 # Main Page Content
@@ -74,9 +112,13 @@ end_date = df['date'].max()
 # start_date, end_date = date_range
 
 # --- Filter Dataframe ---
-filtered_df = df[(df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))]
+# df is sorted by date, so the period is a contiguous slice found by binary search.
+start_idx = df['date'].searchsorted(pd.to_datetime(start_date), side='left')
+end_idx = df['date'].searchsorted(pd.to_datetime(end_date), side='right')
+filtered_df = df.iloc[start_idx:end_idx]
 
-if filtered_df.empty:
+# The slice bounds already say whether the period has any rows.
+if start_idx >= end_idx:
     st.warning("No data available for the selected date range.")
     st.stop()
 
@@ -86,17 +128,28 @@ if filtered_df.empty:
 st.header("Health Check (Period Averages)")
 
 # --- NEW: Calculate averages over the entire filtered period ---
-avg_grr = filtered_df['grr'].mean()
-avg_rev_churn = filtered_df['revenue_churn_rate'].mean()
-avg_arpa = filtered_df['arpa'].mean()
+# The period is identified by its slice bounds, so the averages are cached on those
+# (and the CSV mtime) instead of being recomputed on every rerun.
+@st.cache_data(show_spinner=False, max_entries=16)
+def period_averages(_filtered_df, start_idx, end_idx, mtime):
+    return tuple(_filtered_df[['grr', 'revenue_churn_rate', 'arpa']].mean())
+
+avg_grr, avg_rev_churn, avg_arpa = period_averages(filtered_df, start_idx, end_idx, service_mtime)
 
 # The Target Expansion MRR is forward-looking, so it should still be based on the latest month's data.
-latest_month = filtered_df.sort_values('date', ascending=False).iloc[0]
+# filtered_df is a date-sorted slice, so the latest month is simply its last row.
+latest_month = filtered_df.iloc[-1]
 target_nrr = benchmarks['NRR']['value']
 starting_mrr = latest_month['book_of_business_bom']
 churn_mrr = latest_month['churn_mrr']
 target_expansion_mrr = (target_nrr * starting_mrr) - starting_mrr + churn_mrr
 
+# ARPA trend labels: index 0 is down, index 1 is up.
+TREND_HTML = (
+    "<span style='color:red;'>▼ Trending Down</span> (vs. first month)",
+    "<span style='color:green;'>▲ Trending Up</span> (vs. first month)",
+)
+
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
 with kpi1:
@@ -115,20 +168,12 @@ with kpi3:
     
     # --- UPDATED: Trend calculation now compares first vs. last month ---
     if len(filtered_df) > 1:
-        # Sort by date to easily find the first and last entry
-        sorted_df = filtered_df.sort_values('date')
-        first_month_arpa = sorted_df.iloc[0]['arpa']
-        last_month_arpa = sorted_df.iloc[-1]['arpa']
+        # filtered_df is already sorted by date, so the first and last entries are its ends
+        first_month_arpa = filtered_df['arpa'].iat[0]
+        last_month_arpa = filtered_df['arpa'].iat[-1]
         
-        # Determine trend direction and color
-        if last_month_arpa > first_month_arpa:
-            trend_text = "▲ Trending Up"
-            color = "green"
-        else:
-            trend_text = "▼ Trending Down"
-            color = "red"
-            
-        st.markdown(f"<span style='color:{color};'>{trend_text}</span> (vs. first month)", unsafe_allow_html=True)
+        # Trend direction and color, indexed by whether ARPA went up
+        st.markdown(TREND_HTML[bool(last_month_arpa > first_month_arpa)], unsafe_allow_html=True)
 
 with kpi4:
     # This metric remains the same as it's a forward-looking target
@@ -148,48 +193,67 @@ chart1, chart2 = st.columns(2)
 st.header("Churn Analysis")
 chart1, chart2 = st.columns(2)
 
-with chart1:
-    st.subheader("Monthly Revenue Churn Rate")
-    fig_rev_churn = px.line(filtered_df, x='date', y='revenue_churn_rate', title="Revenue Churn vs. Target")
+# The charts take raw NumPy arrays and build WebGL traces directly, skipping
+# Plotly Express's DataFrame introspection. Long periods are downsampled with LTTB.
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_rev_churn_fig(_filtered_df, start_idx, end_idx, mtime):
+    rev_churn_x, rev_churn_y = lttb(_filtered_df['date'].to_numpy(), _filtered_df['revenue_churn_rate'].to_numpy())
+    fig_rev_churn = go.Figure(go.Scattergl(x=rev_churn_x, y=rev_churn_y, mode='lines'))
+    fig_rev_churn.update_layout(title_text="Revenue Churn vs. Target", xaxis_title='date', yaxis_title='revenue_churn_rate')
     fig_rev_churn.update_yaxes(tickformat=".2%")
     fig_rev_churn.add_hline(y=benchmarks['Monthly Revenue Churn']['value'], line_width=2, line_dash="dash", line_color="red", annotation_text="Target")
-    st.plotly_chart(fig_rev_churn, use_container_width=True)
+    return fig_rev_churn
 
-with chart2:
-    st.subheader("Monthly Customer Churn Rate")
-    fig_cust_churn = px.line(filtered_df, x='date', y='customer_churn_rate', title="Customer Churn Trend")
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_cust_churn_fig(_filtered_df, start_idx, end_idx, mtime):
+    cust_churn_x, cust_churn_y = lttb(_filtered_df['date'].to_numpy(), _filtered_df['customer_churn_rate'].to_numpy())
+    fig_cust_churn = go.Figure(go.Scattergl(x=cust_churn_x, y=cust_churn_y, mode='lines'))
+    fig_cust_churn.update_layout(title_text="Customer Churn Trend", xaxis_title='date', yaxis_title='customer_churn_rate')
     fig_cust_churn.update_yaxes(tickformat=".2%")
     # You can add a benchmark for customer churn here if you have one
-    st.plotly_chart(fig_cust_churn, use_container_width=True)
+    return fig_cust_churn
+
+with chart1:
+    st.subheader("Monthly Revenue Churn Rate")
+    st.plotly_chart(build_rev_churn_fig(filtered_df, start_idx, end_idx, service_mtime), use_container_width=True)
+
+with chart2:
+    st.subheader("Monthly Customer Churn Rate")
+    st.plotly_chart(build_cust_churn_fig(filtered_df, start_idx, end_idx, service_mtime), use_container_width=True)
 
 st.divider() # Add a divider for better separation
 
 st.subheader("Monthly MRR Movement")
-fig_waterfall = go.Figure()
-# Add bars for each component
-fig_waterfall.add_trace(go.Bar(x=filtered_df['date'], y=filtered_df['growth_mrr'], name='New Business MRR', marker_color='green'))
-fig_waterfall.add_trace(go.Bar(x=filtered_df['date'], y=-filtered_df['churn_mrr'], name='Churned MRR', marker_color='red'))
-# Customize layout
-fig_waterfall.update_layout(
-    barmode='relative',
-    title_text='New MRR vs. Churned MRR Each Month',
-    xaxis_title='Month',
-    yaxis_title='MRR Change'
-)
-st.plotly_chart(fig_waterfall, use_container_width=True)
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_waterfall_fig(_filtered_df, start_idx, end_idx, mtime):
+    dates = _filtered_df['date'].to_numpy()
+    fig_waterfall = go.Figure()
+    # Plotly only needs the raw arrays, so skip the Series wrappers (and the negated Series copy).
+    # Add bars for each component
+    fig_waterfall.add_trace(go.Bar(x=dates, y=_filtered_df['growth_mrr'].to_numpy(), name='New Business MRR', marker_color='green'))
+    fig_waterfall.add_trace(go.Bar(x=dates, y=np.negative(_filtered_df['churn_mrr'].to_numpy()), name='Churned MRR', marker_color='red'))
+    # Customize layout
+    fig_waterfall.update_layout(
+        barmode='relative',
+        title_text='New MRR vs. Churned MRR Each Month',
+        xaxis_title='Month',
+        yaxis_title='MRR Change'
+    )
+    return fig_waterfall
+
+st.plotly_chart(build_waterfall_fig(filtered_df, start_idx, end_idx, service_mtime), use_container_width=True)
 
 st.divider()
 
 st.subheader("ARPA (Average Revenue Per Account) Trend")
-fig_arpa = px.line(
-    filtered_df,
-    x='date',
-    y='arpa',
-    title="Monthly ARPA Trend",
-    labels={'arpa': 'ARPA ($)', 'date': 'Date'}
-)
-fig_arpa.update_traces(mode='lines+markers')
-st.plotly_chart(fig_arpa, use_container_width=True)
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_arpa_fig(_filtered_df, start_idx, end_idx, mtime):
+    arpa_x, arpa_y = lttb(_filtered_df['date'].to_numpy(), _filtered_df['arpa'].to_numpy())
+    fig_arpa = go.Figure(go.Scattergl(x=arpa_x, y=arpa_y, mode='lines+markers'))
+    fig_arpa.update_layout(title_text="Monthly ARPA Trend", xaxis_title='Date', yaxis_title='ARPA ($)')
+    return fig_arpa
+
+st.plotly_chart(build_arpa_fig(filtered_df, start_idx, end_idx, service_mtime), use_container_width=True)
 
 st.divider()
 
@@ -242,5 +306,5 @@ st.warning(
 )
 
 st.subheader("Benchmark Sources")
-for key, value in benchmarks.items():
-    st.markdown(f"- **{key}**: [{value['source']}]({value['url']}).")
\ No newline at end of file
+# One markdown block for the whole list instead of one element per source.
+st.markdown("\n".join(f"- **{key}**: [{value['source']}]({value['url']})." for key, value in benchmarks.items()))
\ No newline at end of file
@@ -1,5 +1,7 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
+
+from datasets import file_mtime, read_dataset
 
 # --------------------
 # Page Configuration
@@ -19,42 +21,47 @@ st.set_page_config(
 # Data Loading and Baseline Calculation
 # This function loads all data to calculate the current "baseline" metrics for the sliders.
 # --------------------
-@st.cache_data
-# REPLACE the existing load_baselines function with this one
+MARKETING_CSV = "data/sprinto_database - marketing.csv"
+SERVICE_CSV = "data/sprinto_database - service.csv"
 
-@st.cache_data
-def load_baselines():
+# Only the small baselines dict is cached here, not the frames it's computed from.
+@st.cache_data(persist="disk", show_spinner=False, max_entries=4)
+def load_baselines(marketing_mtime, service_mtime):
     try:
-        marketing_df = pd.read_csv("data/sprinto_database - marketing.csv")
-        service_df = pd.read_csv("data/sprinto_database - service.csv")
-
-        # --- FIX: Convert date columns from string to datetime ---
-        marketing_df['date'] = pd.to_datetime(marketing_df['date'])
-        service_df['date'] = pd.to_datetime(service_df['date'])
+        marketing_df = read_dataset(MARKETING_CSV, columns=['date', 'mql', 'sal', 'sql', 'closed'])
+        service_df = read_dataset(
+            SERVICE_CSV,
+            columns=['date', 'growth_mrr', 'growth_accounts', 'churn_mrr', 'book_of_business_bom', 'book_of_business_eom']
+        )
 
         # --- Calculate Baselines ---
+        # Every total below comes from one NumPy column-sum per file.
+        total_mql, total_sal, total_sql, total_closed = marketing_df[['mql', 'sal', 'sql', 'closed']].to_numpy().sum(axis=0)
+        total_growth_mrr, total_growth_accounts, total_churn_mrr, total_bob = (
+            service_df[['growth_mrr', 'growth_accounts', 'churn_mrr', 'book_of_business_bom']].to_numpy().sum(axis=0)
+        )
+
         # Marketing Funnel Rates
-        total_mql = marketing_df['mql'].sum()
-        total_sal = marketing_df['sal'].sum()
-        total_sql = marketing_df['sql'].sum()
-        total_closed = marketing_df['closed'].sum()
         
         baseline_mql_sal_rate = total_sal / total_mql
         baseline_sal_sql_rate = total_sql / total_sal
         baseline_win_rate = total_closed / total_sql
 
         # Avg MQLs per month
-        num_months_marketing = (marketing_df['date'].max() - marketing_df['date'].min()).days / 30.44
+        # np.ptp takes the date span in one pass over the datetime64 array (no Timestamp boxing).
+        span_days = np.ptp(marketing_df['date'].to_numpy()) / np.timedelta64(1, 'D')
+        num_months_marketing = span_days / 30.44
         baseline_avg_mqls = total_mql / num_months_marketing if num_months_marketing > 0 else 0
 
         # Avg Deal Size (ACV)
-        baseline_avg_deal_size = service_df['growth_mrr'].sum() / service_df['growth_accounts'].sum() if service_df['growth_accounts'].sum() > 0 else 0
+        baseline_avg_deal_size = total_growth_mrr / total_growth_accounts if total_growth_accounts > 0 else 0
         
         # Churn Rate
-        baseline_churn_rate = service_df['churn_mrr'].sum() / service_df['book_of_business_bom'].sum() if service_df['book_of_business_bom'].sum() > 0 else 0
+        baseline_churn_rate = total_churn_mrr / total_bob if total_bob > 0 else 0
 
         # Current Book of Business (take latest EOM)
-        latest_mrr = service_df.sort_values('date', ascending=False).iloc[0]['book_of_business_eom']
+        # idxmax finds the latest month in one pass instead of sorting the whole frame.
+        latest_mrr = service_df.at[service_df['date'].idxmax(), 'book_of_business_eom']
         
         return {
             "mql_sal_rate": baseline_mql_sal_rate,
@@ -69,7 +76,7 @@ def load_baselines():
         st.error("One or more data files were not found. Please ensure all CSV files are in the `data/` directory.")
         return None
 
-baselines = load_baselines()
+baselines = load_baselines(file_mtime(MARKETING_CSV), file_mtime(SERVICE_CSV))
 
 if baselines is None:
     st.stop()
@@ -153,7 +160,41 @@ with col1:
 # =================================================================================================
 # COLUMN 2: The "What If" (The Simulator) - REVISED LAYOUT
 # =================================================================================================
-with col2:
+# --- CALCULATION ENGINE ---
+# A pure function of the lever values (rates as fractions).
+def simulate(mqls_per_month, mql_sal_rate, sal_sql_rate, win_rate, avg_deal_size, target_quota, churn_rate, expansion_rate, current_mrr):
+    # Top of Funnel
+    new_customers_per_month = mqls_per_month * mql_sal_rate * sal_sql_rate * win_rate
+    new_mrr_per_month = new_customers_per_month * (avg_deal_size / 12)
+
+    # Sales Planning
+    required_pipeline = target_quota / win_rate if win_rate > 0 else 0
+    required_coverage = required_pipeline / target_quota if target_quota > 0 else 0
+    sales_velocity = ( (mqls_per_month * mql_sal_rate * sal_sql_rate) * (avg_deal_size/12) * win_rate) / (92/30.44) if win_rate > 0 else 0
+
+    # Overall Revenue Growth
+    expansion_mrr = current_mrr * expansion_rate
+    churned_mrr = current_mrr * churn_rate
+    net_new_mrr = new_mrr_per_month + expansion_mrr - churned_mrr
+    nrr = ((current_mrr + expansion_mrr - churned_mrr) / current_mrr) if current_mrr > 0 else 0
+
+    # Project ARR in 12 months
+    # projected_arr = (current_mrr + (net_new_mrr * 12)) * 12
+
+    return {
+        "new_customers_per_month": new_customers_per_month,
+        "new_mrr_per_month": new_mrr_per_month,
+        "required_pipeline": required_pipeline,
+        "required_coverage": required_coverage,
+        "sales_velocity": sales_velocity,
+        "net_new_mrr": net_new_mrr,
+        "nrr": nrr,
+    }
+
+# A fragment, so moving a lever reruns only the simulator and leaves the rest of the
+# page (data loading, the recommendations column) untouched.
+@st.fragment
+def simulator():
     st.header("Interactive Simulator")
 
     # Create nested columns for the simulator itself
@@ -175,52 +216,35 @@ with col2:
         churn_rate = st.slider("Monthly Revenue Churn (%)", 0.0, 5.0, float(baselines['churn_rate']*100), 0.05)
         expansion_rate = st.slider("Monthly Expansion Rate (%)", 0.0, 5.0, 0.5, 0.05)
 
-    # --- CALCULATION ENGINE (this part sits in col2 but outside the nested columns) ---
     # Convert percentages from sliders
-    mql_sal_rate /= 100
-    sal_sql_rate /= 100
-    win_rate /= 100
-    churn_rate /= 100
-    expansion_rate /= 100
-    
-    # Top of Funnel
-    new_customers_per_month = mqls_per_month * mql_sal_rate * sal_sql_rate * win_rate
-    new_mrr_per_month = new_customers_per_month * (avg_deal_size / 12)
-
-    # Sales Planning
-    required_pipeline = target_quota / win_rate if win_rate > 0 else 0
-    required_coverage = required_pipeline / target_quota if target_quota > 0 else 0
-    sales_velocity = ( (mqls_per_month * mql_sal_rate * sal_sql_rate) * (avg_deal_size/12) * win_rate) / (92/30.44) if win_rate > 0 else 0
-
-    # Overall Revenue Growth
-    current_mrr = baselines['current_mrr']
-    expansion_mrr = current_mrr * expansion_rate
-    churned_mrr = current_mrr * churn_rate
-    net_new_mrr = new_mrr_per_month + expansion_mrr - churned_mrr
-    nrr = ((current_mrr + expansion_mrr - churned_mrr) / current_mrr) if current_mrr > 0 else 0
-
-    # Project ARR in 12 months
-    # projected_arr = (current_mrr + (net_new_mrr * 12)) * 12
+    results = simulate(
+        mqls_per_month, mql_sal_rate / 100, sal_sql_rate / 100, win_rate / 100,
+        avg_deal_size, target_quota, churn_rate / 100, expansion_rate / 100,
+        baselines['current_mrr']
+    )
 
     with output_col:
         st.subheader("Projections (Outputs)")
         
         st.markdown("##### Funnel & New Business")
-        st.metric("Projected New Customers / mo", f"{new_customers_per_month:.1f}")
-        st.metric("Projected New MRR / mo", f"${new_mrr_per_month:,.0f}")
+        st.metric("Projected New Customers / mo", f"{results['new_customers_per_month']:.1f}")
+        st.metric("Projected New MRR / mo", f"${results['new_mrr_per_month']:,.0f}")
         
         st.markdown("##### Sales Planning")
-        st.metric("Required Pipeline to Hit Target", f"${required_pipeline:,.0f}")
-        st.metric("Required Pipeline Coverage", f"{required_coverage:.1f}x", help="Benchmark: 4x")
-        st.metric("Proj. Sales Velocity ($/mo)", f"${sales_velocity:,.0f}", help="Based on a 92-day sales cycle")
+        st.metric("Required Pipeline to Hit Target", f"${results['required_pipeline']:,.0f}")
+        st.metric("Required Pipeline Coverage", f"{results['required_coverage']:.1f}x", help="Benchmark: 4x")
+        st.metric("Proj. Sales Velocity ($/mo)", f"${results['sales_velocity']:,.0f}", help="Based on a 92-day sales cycle")
 
         st.markdown("##### Overall Revenue Growth")
-        st.metric("Net New MRR / mo", f"${net_new_mrr:,.0f}")
-        st.metric("Net Revenue Retention (NRR)", f"{nrr:.1%}")
+        st.metric("Net New MRR / mo", f"${results['net_new_mrr']:,.0f}")
+        st.metric("Net Revenue Retention (NRR)", f"{results['nrr']:.1%}")
         # st.metric("Projected ARR in 12 Months", f"${projected_arr:,.0f}")
 
     st.divider()
 
+with col2:
+    simulator()
+
 # --- Assumptions Section ---
 st.subheader("Assumptions for the Simulator")
 st.warning(
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Run from anywhere: the dataset helpers live at the repo root.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from datasets import parquet_path, write_parquet
+
+# --------------------
+# CSV -> Parquet
+# Writes the Parquet copies ahead of time (e.g. at build/deploy time) so the first
+# page load doesn't pay for CSV parsing. The pages fall back to the CSVs and
+# write these copies themselves when they are missing or stale.
+# --------------------
+DATASETS = [
+    "data/sprinto_database - marketing.csv",
+    "data/sprinto_database - sales.csv",
+    "data/sprinto_database - service.csv",
+]
+
+if __name__ == "__main__":
+    for csv_path in DATASETS:
+        csv_path = os.path.join(ROOT, csv_path)
+        write_parquet(csv_path)
+        print(f"{csv_path} -> {parquet_path(csv_path)}")